@@ -87,6 +87,7 @@ TO DO:
 from sage.all import SageObject, ZZ, QQ, NumberField, GaussValuation, PolynomialRing, Polynomial, Integer, matrix, IntegerModRing, mod, Infinity, prod, lcm, vector, GF
 from sage.geometry.newton_polygon import NewtonPolygon
 from sage.rings.valuation.limit_valuation import LimitValuation
+from sage.misc.cachefunc import cached_method, cached_function
 
 
 class FakepAdicCompletion(SageObject):
@@ -141,7 +142,7 @@ class FakepAdicCompletion(SageObject):
         assert n == e*f
         assert n == P.degree()
         self._number_field = K0
-        self._v_p = QQ.valuation(p)
+        self._v_p = _padic_valuation_on_QQ(p)
         self._valuation = vK
         self._p = p
         self._uniformizer = piK
@@ -178,12 +179,14 @@ class FakepAdicCompletion(SageObject):
         return self._valuation
 
 
+    @cached_method
     def normalized_valuation(self):
         r"""
         Return the normalized valuation on this p-adic field.
 
         Here *normalized* means that the valuation takes the value `1` on a
-        uniformizer.
+        uniformizer. The result is cached, since it is needed repeatedly for
+        the computation of ramification polygons.
 
         """
         v = self.valuation().scale(self.absolute_ramification_degree())
@@ -299,11 +302,6 @@ class FakepAdicCompletion(SageObject):
         into `L_0`.
 
         """
-        # print("entering extension with ")
-        # print("K = ", self)
-        # print("f = ", f)
-        # print()
-
         K0 = self.number_field()
         assert K0.has_coerce_map_from(f.parent().base_ring())
         f = f.change_ring(K0)
@@ -533,7 +531,7 @@ class FakepAdicCompletion(SageObject):
     def reduce_polynomial(self, f, N):
 
         R = f.parent()
-        return R([self.reduce(f[i], N) for i in range(f.degree()+1)])
+        return R([self.reduce(c, N) for c in f.list()])
 
 
     def reduce_rational_number(self, a, N):
@@ -708,8 +706,7 @@ class FakepAdicCompletion(SageObject):
             if m == 1:
                 return [QQ.one()]
 
-            p = self.p()
-            fb = GF(p**m, 'zeta').polynomial()
+            fb = unramified_polynomial(self.p(), m)
             f = fb.change_ring(self.number_field())
             fx = f.derivative()
             vK = self.valuation()
@@ -754,13 +751,14 @@ class FakepAdicCompletion(SageObject):
 
         """
         K0 = self.number_field()
-        R = PolynomialRing(K0, 'x')
-        x = R.gen()
-        e = self.ramification_degree()
         m = self.inertia_degree()
         if m == 1:
+            # K is totally ramified, and P is the defining polynomial of K
             return self.polynomial().change_ring(K0)
 
+        R = PolynomialRing(K0, 'x')
+        x = R.gen()
+        e = self.ramification_degree()
         zeta = self.integral_basis_of_unramified_subfield(N)
         S = self.base_change_matrix(precision=N, integral_basis="mixed")
         P = x**e - sum( sum(S[e,i+e*j]*zeta[j] for j in range(m))*x**i for i in range(e))
@@ -1133,7 +1131,6 @@ class FakepAdicCompletion(SageObject):
                 if v.mu() < Infinity:
                     V = v.mac_lane_step(f, assume_squarefree=True, check=False)
                     if len(V) > 1:
-                        # print("len(V) > 1")
                         return None
                     v1 = V[0]
             # now v.phi().degree() = d, and either v1.phi().degree() > d
@@ -1146,13 +1143,53 @@ class FakepAdicCompletion(SageObject):
                         FakepAdicEmbedding(L, K)
                         # this can be very slow, but so far it is the only
                         # conclusive test I know
-                        # print("found subfield of degree %s and ramification degree %s"%(L.degree(), L.ramification_degree()))
                         return L
                     except AssertionError:
                         pass
-                        # print("no embedding into L!")
             if v.mu() == Infinity:
-                # print("v.mu() = Infinity")
                 return None
             else:
                 v = v1  # we go to a larger degree
+
+
+#-----------------------------------------------------------------------------
+
+
+@cached_function
+def unramified_polynomial(p, m):
+    r"""
+    Return the defining polynomial of the unramified extension of degree `m`.
+
+    INPUT:
+
+    - ``p`` -- a prime number
+    - ``m`` -- a positive integer
+
+    OUTPUT: the defining polynomial of the standard generator of the finite
+    field with `p^m` elements, as a polynomial over `\mathbb{F}_p`.
+
+    Since the result only depends on `p` and `m`, it is cached and shared
+    between all `p`-adic number fields with the same inertia degree.
+
+    EXAMPLES::
+
+        sage: from mclf.padic_extensions.fake_padic_completions import unramified_polynomial
+        sage: unramified_polynomial(2, 2).degree()
+        2
+        sage: unramified_polynomial(2, 2) is unramified_polynomial(2, 2)
+        True
+
+    """
+    return GF(p**m, 'zeta').polynomial()
+
+
+@cached_function
+def _padic_valuation_on_QQ(p):
+    r"""
+    Return the `p`-adic valuation on the field of rational numbers.
+
+    This is shared by all `p`-adic number fields with residue characteristic
+    `p`.
+
+    """
+    return QQ.valuation(p)
@@ -97,8 +97,9 @@ TO DO:
 #*****************************************************************************
 
 
-from sage.all import PolynomialRing, Polynomial, ZZ, QQ, prod
+from sage.all import PolynomialRing, Polynomial, ZZ, QQ, Infinity, prod, binomial
 from sage.geometry.newton_polygon import NewtonPolygon
+from sage.misc.cachefunc import cached_method
 from mclf.padic_extensions.fake_padic_completions import FakepAdicCompletion
 from mclf.padic_extensions.fake_padic_extensions import FakepAdicExtension
 from mclf.padic_extensions.slope_factors import slope_factors
@@ -125,26 +126,21 @@ class WeakPadicGaloisExtension(FakepAdicExtension):
     """
     def __init__(self, K, F, minimal_ramification=1):
         minimal_ramification = ZZ(minimal_ramification)
-        # print "entering WeakPadicGaloisExtension with"
-        # print "F = %s"%F
-        # if F is a polynomial, replace it by the list of its irreducible factors
-        # if isinstance(F, Polynomial):
-        #     F = [f for f, m in F.factor()]
         assert K.is_Qp(), "for the moment, K has to be Q_p"
-        # assert not K.p().divides(minimal_ramification), "minimal_ramification has to be prime to p"
         if not isinstance(F, Polynomial):
-            if F == []:
+            if len(F) == 0:
                 F = PolynomialRing(K.number_field(),'x')(1)
+            elif len(F) == 1:
+                F = F[0]
             else:
                 F = prod(F)
         self._base_field = K
         L = K.weak_splitting_field(F)
         e = ZZ(L.absolute_ramification_degree()/K.absolute_ramification_degree())
         if not minimal_ramification.divides(e):
-                        # enlarge the absolute ramification index of vL
-                        # such that minimal_ramification divides e(vL/vK):
-            m = ZZ(minimal_ramification/e.gcd(minimal_ramification))
-            # assert not self.p().divides(m), "p = %s, m = %s, e = %s,\nminimal_ramification = %s"%(self.p(), m, e, minimal_ramification)
+            # enlarge the absolute ramification index of vL
+            # such that minimal_ramification divides e(vL/vK):
+            m = minimal_ramification // e.gcd(minimal_ramification)
             L = L.ramified_extension(m)
             # if m was not prime to p, L/K may not be weak Galois anymore
         else:
@@ -160,6 +156,7 @@ class WeakPadicGaloisExtension(FakepAdicExtension):
         return "%s as weak Galois extension of %s"%(self._extension_field, self._base_field)
 
 
+    @cached_method
     def ramification_filtration(self, upper_numbering=False):
         r"""
         Return the list of ramification jumps.
@@ -203,85 +200,89 @@ class WeakPadicGaloisExtension(FakepAdicExtension):
 
         """
 
-        if upper_numbering:
-            if hasattr(self, "_upper_jumps"):
-                return self._upper_jumps
-            else:
-                self._compute_upper_jumps()
-                return self._upper_jumps
-        else:
-            if hasattr(self, "_lower_jumps"):
-                return self._lower_jumps
-            else:
-                self._compute_lower_jumps()
-                return self._lower_jumps
+        if not upper_numbering:
+            return self._lower_filtration()
+        # we compute the upper jumps with Herbrand's function, in one pass
+        # over the lower jumps
+        e = self.ramification_degree()
+        upper_jumps = []
+        u = 0
+        l_prev = 0
+        for l, m in self.iter_ramification_filtration():
+            u += (l - l_prev)*m/e
+            upper_jumps.append((u, m))
+            l_prev = l
+        return upper_jumps
 
 
-    def lower_jumps(self):
+    def iter_ramification_filtration(self, upper_numbering=False):
         r"""
-        Return the upper jumps of the ramification filtration of this extension.
+        Return an iterator over the ramification filtration of this extension.
+
+        INPUT:
+
+        - ``upper_numbering`` -- a boolean (default: ``False``)
+
+        OUTPUT: an iterator over the pairs `(u, m_u)` returned by
+        :meth:`ramification_filtration`, without copying them into a new list.
+
+        EXAMPLES::
+
+            sage: from mclf import *
+            sage: v_3 = QQ.valuation(3)
+            sage: Q_3 = FakepAdicCompletion(QQ, v_3)
+            sage: R.<x> = QQ[]
+            sage: L = WeakPadicGaloisExtension(Q_3, x^6+6*x^4+6*x^3+18)
+            sage: [u for u, m in L.iter_ramification_filtration(upper_numbering=True)]
+            [0, 1/2]
 
         """
-        return [u for u, m in self.ramification_filtration()]
+        return iter(self.ramification_filtration(upper_numbering))
 
 
-    def upper_jumps(self):
+    def lower_jumps(self):
         r"""
         Return the lower jumps of the ramification filtration of this extension.
 
         """
-        return [u for u, m in self.ramification_filtration(upper_numbering=True)]
+        return [u for u, m in self.iter_ramification_filtration()]
 
 
-    def _compute_lower_jumps(self):
-        """
-        This method computes the lower jumps and stores them
-        as ``_lower_jumps``.
+    def upper_jumps(self):
+        r"""
+        Return the upper jumps of the ramification filtration of this extension.
 
         """
-        if self.ramification_degree() == 1:
-            self._lower_jumps = []
-        else:
-            NP = self.ramification_polygon()
-            # this is the Newton polygon of the ramification
-            # polygon G
-            jumps = []
-            for v1, v2 in zip(NP.vertices(), NP.vertices()[1:]):
-                u = (v1[1]-v2[1])/(v2[0]-v1[0]) - 1  # jump = -slope - 1
-                if u == 0:                # G does not distinguish Gamma and Gamma_0
-                    m = self.ramification_degree()
-                else:
-                    m = v2[0] + 1
-                jumps.append((u, m))
-            jumps.reverse()               # increasing order for jumps
-            if len(jumps) >= 2 and jumps[0][1] == jumps[1][1]:
-                jumps = jumps[1:]     # u=0 is not a jump
-            self._lower_jumps = jumps
+        return [u for u, m in self.iter_ramification_filtration(upper_numbering=True)]
 
 
-    def _compute_upper_jumps(self):
-        """
-        This method computes the upper jumps and stores them
-        as ``_upper_jumps``.
+    @cached_method
+    def _lower_filtration(self):
+        r"""
+        Return the ramification filtration of this extension, with respect
+        to the lower numbering.
+
+        This is the list of pairs `(u, m_u)` returned by
+        :meth:`ramification_filtration` for ``upper_numbering=False``; it is
+        read off from the ramification polygon.
 
         """
-        if self.lower_jumps() == []:
-            self._upper_jumps = []
-        else:
-            jumps = self.ramification_filtration()
-            m = [m_i for m_i, g_i in jumps]
-            g = [g_i for m_i, g_i in jumps]
-            e = self.ramification_degree()
-            u = [m[0]*g[0]/e]
-            for i in range(1, len(jumps)):
-                u.append(u[i-1]+(m[i]-m[i-1])*g[i]/e)
-            self._upper_jumps = [(u[i], g[i]) for i in range(len(jumps))]
+        if self.ramification_degree() == 1:
+            return []
+        return _jumps_from_vertices(self._ramification_polygon_vertices(),
+                                    self.ramification_degree())
 
 
+    @cached_method
     def ramification_polynomial(self, precision=20):
         r"""
         Return the ramification polynomial of this weak Galois extension.
 
+        INPUT:
+
+        - ``precision`` -- a positive integer (default: `20`); the precision
+          with which the minimal polynomial `P` of `\pi` is approximated
+
         The *ramification polynomial* is the polynomial
 
         .. MATH::
@@ -299,16 +300,15 @@ class WeakPadicGaloisExtension(FakepAdicExtension):
           number field `L_0` underlying `L`.
 
         """
-        if not hasattr(self, "_ramification_polynomial"):
-            assert self.base_field().is_Qp(), "K has to be equal to Q_p"
-            L = self.extension_field()
-            pi = L.uniformizer()
-            P = L.minpoly_over_unramified_subextension(precision)
-            x = P.parent().gen()
-            self._ramification_polynomial = P(pi+x).shift(-1)
-        return self._ramification_polynomial
+        assert self.base_field().is_Qp(), "K has to be equal to Q_p"
+        L = self.extension_field()
+        pi = L.uniformizer()
+        P = L.minpoly_over_unramified_subextension(precision)
+        x = P.parent().gen()
+        return P(pi+x).shift(-1)
 
 
+    @cached_method
     def ramification_polygon(self):
         r"""
         Return the ramification polygon of this extension.
@@ -338,13 +338,40 @@ class WeakPadicGaloisExtension(FakepAdicExtension):
           number field `L_0` underlying `L`.
 
         """
-        if not hasattr(self, "_ramification_polygon"):
-            assert self.base_field().is_Qp(), "K has to be equal to Q_p"
-            L = self.extension_field()
-            vL = L.normalized_valuation()
-            G = self.ramification_polynomial()
-            self._ramification_polygon = NewtonPolygon([(i, vL(G[i])) for i in range(G.degree()+1)])
-        return self._ramification_polygon
+        return NewtonPolygon(self._ramification_polygon_vertices())
+
+
+    @cached_method
+    def _ramification_polygon_vertices(self):
+        r"""
+        Return the vertices of the ramification polygon of this extension.
+
+        OUTPUT: the list of vertices of the ramification polygon, ordered by
+        increasing abscissa.
+
+        Since the abscissae of the points defining the ramification polygon
+        are already sorted, we do not need to construct a general Newton
+        polygon to find its vertices.
+
+        If `L/K` is totally ramified, then `P` has rational coefficients, and
+        we obtain cheap lower bounds for the valuations of the coefficients
+        of `G`. The valuation `v_L` is then only evaluated on those
+        coefficients of `G` which may give a vertex of the polygon.
+
+        """
+        assert self.base_field().is_Qp(), "K has to be equal to Q_p"
+        if self.ramification_degree() == 1:
+            # L/K is unramified, so G = 1
+            return [(ZZ(0), QQ(0))]
+        L = self.extension_field()
+        vL = L.normalized_valuation()
+        G = self.ramification_polynomial()
+        if L.inertia_degree() == 1:
+            lower_bounds = _taylor_shift_lower_bounds(L.polynomial(),
+                L.base_valuation(), L.absolute_ramification_degree())
+        else:
+            lower_bounds = None
+        return _newton_polygon_lazy(G, vL, lower_bounds)
 
 
     def factors_of_ramification_polynomial(self, precision=10):
@@ -357,7 +384,6 @@ class WeakPadicGaloisExtension(FakepAdicExtension):
         polygon has a single slope `s`. We omit the factor with slope `s=-1`.
 
         """
-        # from mclf.padic_extensions.slope_factors import slope_factors
         G = self.ramification_polynomial()
         R = G.parent()
         L = self.extension_field()
@@ -369,7 +395,7 @@ class WeakPadicGaloisExtension(FakepAdicExtension):
         F_reduced = {}
         for s in F.keys():
             g = F[s]
-            g = R([L.reduce(g[i], N) for i in range(g.degree()+1)])
+            g = R([L.reduce(c, N) for c in g.list()])
             F_reduced[s] = g
         return F_reduced
 
@@ -389,9 +415,9 @@ class WeakPadicGaloisExtension(FakepAdicExtension):
         e = self.ramification_degree()
         v_p = L.base_valuation()
         pi = L.uniformizer()
-        NP = self.ramification_polygon()
-        slopes = NP.slopes(False)
-        vertices = NP.vertices()
+        vertices = self._ramification_polygon_vertices()
+        slopes = [(y2 - y1)/(x2 - x1) for (x1, y1), (x2, y2) in zip(vertices, vertices[1:])]
+        Qp = FakepAdicCompletion(QQ, v_p)
         subfields = {}
         while len(subfields.keys()) < len(slopes):
             factors = self.factors_of_ramification_polynomial(precision)
@@ -404,7 +430,7 @@ class WeakPadicGaloisExtension(FakepAdicExtension):
                 if s == 1:        # this slope corresponds to the inertia subgroup G_0
                                 # the corresponding subfield is the max. unramified ext.
                                 #  we return Q_p because unramified extensions are ignored
-                    subfields[0] = FakepAdicCompletion(QQ, v_p)
+                    subfields[0] = Qp
                 else:
                     g = factors[-s]
                     beta = beta*(-1)**k*g(-pi)
@@ -440,3 +466,171 @@ class WeakPadicGaloisExtension(FakepAdicExtension):
 
 
 #-----------------------------------------------------------------------------
+
+
+def _jumps_from_vertices(vertices, e):
+    r"""
+    Return the lower ramification filtration encoded by a ramification polygon.
+
+    INPUT:
+
+    - ``vertices`` -- the list of vertices of the ramification polygon of a
+      weak Galois extension, ordered by increasing abscissa
+    - ``e`` -- the ramification degree of the extension
+
+    OUTPUT: the list of pairs `(u, m_u)`, ordered by increasing jumps `u`,
+    as returned by :meth:`WeakPadicGaloisExtension.ramification_filtration`.
+
+    EXAMPLES::
+
+        sage: from mclf.padic_extensions.weak_padic_galois_extensions import _jumps_from_vertices
+        sage: _jumps_from_vertices([(0, 9), (2, 3), (5, 0)], 6)
+        [(0, 6), (2, 3)]
+
+    """
+    jumps = []
+    for i in range(len(vertices) - 1, 0, -1):   # increasing order for jumps
+        x1, y1 = vertices[i-1]
+        x2, y2 = vertices[i]
+        dx = x2 - x1
+        u = (y1 - y2 - dx)/dx                   # jump = -slope - 1
+        if u == 0:                # G does not distinguish Gamma and Gamma_0
+            m = e
+        else:
+            m = x2 + 1
+        jumps.append((u, m))
+    if len(jumps) >= 2 and jumps[0][1] == jumps[1][1]:
+        jumps = jumps[1:]     # u=0 is not a jump
+    return jumps
+
+
+def _taylor_shift_lower_bounds(P, v_p, e):
+    r"""
+    Return lower bounds for the valuations of the coefficients of a
+    ramification polynomial.
+
+    INPUT:
+
+    - ``P`` -- a monic polynomial over `\mathbb{Q}`, of degree `n`
+    - ``v_p`` -- the `p`-adic valuation on `\mathbb{Q}`
+    - ``e`` -- a positive integer
+
+    OUTPUT: a list of lower bounds for `v_L(G_j)`, `j=0,\ldots,n-1`, where
+
+    .. MATH::
+
+        G = \sum_j G_jx^j := P(x+\pi)/x,
+
+    and `v_L` is a valuation on a field containing a root `\pi` of `P`, such
+    that `v_L(\pi)=1` and `v_L(p)=e`.
+
+    The bounds follow from the formula
+
+    .. MATH::
+
+        G_j = \sum_{k>j} \binom{k}{j+1} P_k \pi^{k-j-1}
+
+    and only require the computation of `p`-adic valuations of rational
+    numbers.
+
+    EXAMPLES::
+
+        sage: from mclf.padic_extensions.weak_padic_galois_extensions import _taylor_shift_lower_bounds
+        sage: R.<x> = QQ[]
+        sage: _taylor_shift_lower_bounds(x^2 - 2, QQ.valuation(2), 2)
+        [3, 0]
+
+    """
+    p = v_p.p()
+    values = [e*v_p(c) for c in P.list()]
+    n = len(values) - 1
+    bounds = []
+    for j in range(n):
+        bounds.append(min(e*binomial(k, j + 1).valuation(p) + values[k] + k - j - 1
+                          for k in range(j + 1, n + 1) if values[k] < Infinity))
+    return bounds
+
+
+def _newton_polygon_lazy(f, v, lower_bounds=None):
+    r"""
+    Return the vertices of the Newton polygon of a polynomial, evaluating the
+    valuation on as few coefficients as possible.
+
+    INPUT:
+
+    - ``f`` -- a nonzero polynomial
+    - ``v`` -- a valuation on the base ring of `f`
+    - ``lower_bounds`` -- a list of lower bounds for the valuations of the
+      coefficients of `f`, or ``None`` (default: ``None``)
+
+    OUTPUT: the list of vertices of the Newton polygon of `f` with respect to
+    `v`, ordered by increasing abscissa.
+
+    The valuation is never evaluated on coefficients which are zero. If
+    ``lower_bounds`` is given, we first compute the Newton polygon of the
+    bounds, and then replace the bounds by the exact values only at the
+    vertices, until all vertices are exact. A coefficient whose lower bound
+    lies above the Newton polygon is never evaluated.
+
+    """
+    coefficients = f.list()
+    points = []
+    is_exact = []
+    for i, c in enumerate(coefficients):
+        if c.is_zero():
+            points.append((ZZ(i), Infinity))
+            is_exact.append(True)
+        elif lower_bounds is None:
+            points.append((ZZ(i), v(c)))
+            is_exact.append(True)
+        else:
+            points.append((ZZ(i), lower_bounds[i]))
+            is_exact.append(False)
+    while True:
+        vertices = _lower_convex_hull(points)
+        inexact_vertices = [i for i, _ in vertices if not is_exact[i]]
+        if inexact_vertices == []:
+            return vertices
+        for i in inexact_vertices:
+            points[i] = (ZZ(i), v(coefficients[i]))
+            is_exact[i] = True
+
+
+def _lower_convex_hull(points):
+    r"""
+    Return the vertices of the lower convex hull of a list of points.
+
+    INPUT:
+
+    - ``points`` -- a list of pairs `(x, y)`, ordered by strictly increasing
+      `x`; the value `y` may be ``Infinity``
+
+    OUTPUT: the list of vertices of the lower convex hull of the points with
+    finite `y`, ordered by increasing `x`. This is the list of vertices of the
+    Newton polygon of the points.
+
+    Since the points are already sorted, this takes only linear time.
+
+    EXAMPLES::
+
+        sage: from mclf.padic_extensions.weak_padic_galois_extensions import _lower_convex_hull
+        sage: _lower_convex_hull([(0, 3), (1, 1), (2, Infinity), (3, 1), (4, 0)])
+        [(0, 3), (1, 1), (4, 0)]
+        sage: _lower_convex_hull([(0, 2), (1, 1), (2, 0)])
+        [(0, 2), (2, 0)]
+
+    """
+    hull = []
+    for x, y in points:
+        if y == Infinity:
+            continue
+        # remove the last vertex as long as it does not lie strictly below
+        # the line through its predecessor and the new point
+        while len(hull) >= 2:
+            (x1, y1), (x2, y2) = hull[-2], hull[-1]
+            if (y2 - y1)*(x - x2) >= (y - y2)*(x2 - x1):
+                hull.pop()
+            else:
+                break
+        hull.append((x, y))
+    return hull